@@ -13,19 +13,31 @@ Usage:
     status = hubspace_controller.get_all_status()
 """
 import asyncio
+import functools
 import json
 import os
+import sys
 import threading
 import time
+from collections import defaultdict
 from dotenv import dotenv_values
 
-# Try to import aioafero — if not installed, module degrades gracefully
+# Try to import aioafero (and its aiohttp dependency) — if not installed, module degrades gracefully
 try:
+    import aiohttp
     from aioafero import v1 as afero_v1
     HAS_AIOAFERO = True
 except ImportError:
     HAS_AIOAFERO = False
 
+# orjson is optional; it just makes the hot PUT-body serialization cheaper
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
 _env = dotenv_values(os.path.join(os.path.dirname(__file__), ".env"))
 
 # Bridge singleton + event loop in background thread
@@ -33,23 +45,44 @@ _bridge = None
 _loop = None
 _thread = None
 _ready = threading.Event()
+_shutdown_event = None  # asyncio.Event on _loop; set by stop()
 _devices = {}  # id -> {name, type, ...}
-_device_names = {}  # friendly_name_lower -> id
-_status_cache = {}  # id -> {data, ts}
+_light_ids = ()  # ids of devices with type "light", built once after discovery
+_device_names = {}  # normalized friendly name -> id
+_NAME_NORM = str.maketrans("", "", " _-")  # "Kitchen Left" == "kitchen_left"
+_status_cache = {}  # id -> {data, ts, seq}
+_inflight = {}  # id -> (asyncio.Task, seq) of a status fetch in progress
+_write_seq = defaultdict(int)  # id -> count of commands sent; bumped on every write
 _CACHE_TTL = 10  # seconds
+_STATUS_TIMEOUT = 12  # seconds per device in get_all_status; under the 15s batch timeout
+_http_session = None  # shared aiohttp.ClientSession for Afero REST calls
+_account_id = None  # snapshot of _bridge._account_id after init
+
+
+def _register_name(name, dev_id):
+    """Index a device by normalized name; the first device keeps a contested name."""
+    key = name.lower().translate(_NAME_NORM)
+    existing = _device_names.get(key)
+    if existing and existing != dev_id:
+        print(f"[Hubspace] Name collision: '{name}' (id={dev_id}) matches id={existing} — use the ID")
+        return
+    _device_names[key] = dev_id
 
 
 def _run_loop():
     """Background thread: run asyncio event loop with the aioafero bridge."""
     global _bridge, _loop
     _loop = asyncio.new_event_loop()
+    if sys.version_info >= (3, 12):
+        # Cache hits in gathered status tasks finish without ever suspending
+        _loop.set_task_factory(asyncio.eager_task_factory)
     asyncio.set_event_loop(_loop)
     _loop.run_until_complete(_init_bridge())
 
 
 async def _init_bridge():
     """Authenticate, discover devices, then keep loop alive for commands."""
-    global _bridge
+    global _bridge, _http_session, _light_ids, _account_id, _shutdown_event
 
     email = _env.get("HUBSPACE_EMAIL", "")
     pw = _env.get("HUBSPACE_PASSWORD", "")
@@ -74,6 +107,14 @@ async def _init_bridge():
     except Exception as e:
         print(f"[Hubspace] Init error: {e}")
 
+    _account_id = _bridge._account_id
+
+    # One pooled session for all direct REST calls (keep-alive to Afero)
+    _http_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=10, keepalive_timeout=60),
+        timeout=aiohttp.ClientTimeout(total=10),
+    )
+
     # Catalog discovered devices via aioafero
     for label, controller in [("light", _bridge.lights), ("fan", _bridge.fans), ("switch", _bridge.switches)]:
         for dev in controller.items:
@@ -82,60 +123,71 @@ async def _init_bridge():
                 "type": label,
                 "id": dev.id,
             }
-            _device_names[dev.name.lower()] = dev.id
+            _register_name(dev.name, dev.id)
             print(f"[Hubspace]   {label}: {dev.name} (id={dev.id})")
 
     # Fallback: if aioafero found 0 devices, query the API directly
     if not _devices:
         print("[Hubspace] aioafero found 0 devices — trying direct API...")
         try:
-            import aiohttp
             token = await _bridge._auth.token()
-            account_id = _bridge._account_id
-            async with aiohttp.ClientSession() as sess:
-                url = f"https://semantics2.afero.net/v1/accounts/{account_id}/metadevices"
-                headers = {"Authorization": f"Bearer {token}"}
-                async with sess.get(url, headers=headers, params={"expansions": "state"}) as resp:
-                    if resp.status == 200:
-                        raw = await resp.json()
-                        for dev in raw:
-                            dev_id = dev.get("id", "")
-                            name = dev.get("friendlyName", "unnamed")
-                            values = dev.get("state", {}).get("values", [])
-                            funcs = [v.get("functionClass") for v in values if v.get("functionClass")]
-                            has_power = "power" in funcs
-                            if has_power:
-                                _devices[dev_id] = {"name": name, "type": "light", "id": dev_id}
-                                _device_names[name.lower()] = dev_id
-                                print(f"[Hubspace]   light: {name} (id={dev_id})")
+            url = f"https://semantics2.afero.net/v1/accounts/{_account_id}/metadevices"
+            headers = {"Authorization": f"Bearer {token}"}
+            async with _http_session.get(url, headers=headers, params={"expansions": "state"}) as resp:
+                if resp.status == 200:
+                    raw = await resp.json()
+                    for dev in raw:
+                        dev_id = dev.get("id", "")
+                        name = dev.get("friendlyName", "unnamed")
+                        values = dev.get("state", {}).get("values", [])
+                        funcs = [v.get("functionClass") for v in values if v.get("functionClass")]
+                        has_power = "power" in funcs
+                        if has_power:
+                            _devices[dev_id] = {"name": name, "type": "light", "id": dev_id}
+                            _register_name(name, dev_id)
+                            print(f"[Hubspace]   light: {name} (id={dev_id})")
         except Exception as e:
             print(f"[Hubspace] Direct API fallback failed: {e}")
 
+    _light_ids = tuple(dev_id for dev_id, dev_info in _devices.items() if dev_info["type"] == "light")
+    get_device_id.cache_clear()  # drop any misses recorded before discovery finished
+    _shutdown_event = asyncio.Event()
     _ready.set()
     print(f"[Hubspace] {len(_devices)} devices ready")
 
-    # Keep the event loop alive for future commands
+    # Keep the event loop alive for future commands until stop() is called
     try:
-        while True:
-            await asyncio.sleep(60)
+        await _shutdown_event.wait()
     except asyncio.CancelledError:
         pass
     finally:
+        try:
+            await _http_session.close()
+        except Exception:
+            pass
         try:
             await asyncio.wait_for(_bridge.close(), timeout=5)
         except Exception:
             pass
+        _bridge = None
 
 
 def _run_async(coro, timeout=10):
-    """Submit a coroutine to the background loop and wait for result."""
+    """Submit a coroutine to the background loop and wait for result.
+
+    Only for sync callers (Flask threads). Code already running on the loop
+    must await coroutines directly or use asyncio.gather/create_task.
+    """
+    if threading.current_thread() is _thread:
+        coro.close()
+        raise RuntimeError("_run_async() called from the Hubspace loop; await the coroutine instead")
     if not _loop or not _bridge:
         return {"error": "Hubspace not connected"}
     future = asyncio.run_coroutine_threadsafe(coro, _loop)
     try:
         return future.result(timeout=timeout)
     except Exception as e:
-        return {"error": str(e)}
+        return {"error": str(e) or type(e).__name__}
 
 
 def start():
@@ -149,56 +201,100 @@ def start():
     _ready.wait(timeout=25)
 
 
+def stop():
+    """Close the Hubspace bridge and wait for the background thread to exit."""
+    if _loop and _shutdown_event and _thread and _thread.is_alive():
+        _loop.call_soon_threadsafe(_shutdown_event.set)
+        _thread.join(timeout=10)
+
+
 def get_devices():
     """Return dict of all discovered devices."""
     return dict(_devices)
 
 
+@functools.lru_cache(maxsize=256)
 def get_device_id(name_or_id):
     """Resolve a device name or ID to the actual ID."""
     if name_or_id in _devices:
         return name_or_id
-    return _device_names.get(name_or_id.lower())
+    return _device_names.get(name_or_id.lower().translate(_NAME_NORM))
+
+
+def _invalidate(resolved):
+    """Mark a device's cached status stale around a write.
+
+    Called before the write is sent and again (via _written) once it has
+    finished. Bumping the sequence stops any status fetch that overlapped
+    the write from caching the pre-write state it may have read back.
+    """
+    _write_seq[resolved] += 1
+    _status_cache.pop(resolved, None)
+
+
+async def _written(resolved, coro):
+    """Await a write coroutine, then invalidate again so overlapping reads aren't cached."""
+    try:
+        return await coro
+    finally:
+        _invalidate(resolved)
+
+
+def _cached_status(resolved):
+    """Return cached status if fresh and no write has happened since, else None."""
+    cached = _status_cache.get(resolved)
+    if cached and cached["seq"] == _write_seq[resolved] and (time.time() - cached["ts"]) < _CACHE_TTL:
+        return cached["data"]
+    return None
 
 
 # --- Direct Afero REST API helpers ---
 
+_PUT_HEADERS = {
+    "Content-Type": "application/json; charset=utf-8",
+    "Host": "semantics2.afero.net",
+}
+
+
 async def _api_set_state(device_id, function_class, value):
     """Set a device state value via direct Afero REST API."""
-    import aiohttp
-    token = await _bridge._auth.token()
-    account_id = _bridge._account_id
-    url = f"https://semantics2.afero.net/v1/accounts/{account_id}/metadevices/{device_id}/state"
+    return await _api_set_state_multi(device_id, [(function_class, value)])
+
+
+async def _api_set_state_multi(device_id, pairs):
+    """Set several (function_class, value) states in one Afero REST request."""
+    url = f"https://semantics2.afero.net/v1/accounts/{_account_id}/metadevices/{device_id}/state"
+    ts = int(time.time() * 1000)
     payload = {
         "metadeviceId": device_id,
         "values": [{
             "functionClass": function_class,
             "functionInstance": None,
             "value": value,
-            "lastUpdateTime": int(time.time() * 1000),
-        }],
+            "lastUpdateTime": ts,
+        } for function_class, value in pairs],
     }
-    async with aiohttp.ClientSession() as sess:
-        async with sess.put(url, json=payload, headers={
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json; charset=utf-8",
-            "Host": "semantics2.afero.net",
-        }) as resp:
-            return resp.status in (200, 202, 204)
+    data = _dumps(payload)
+    # aioafero caches the bearer and refreshes it at expiry; retry once on a 401
+    # in case it lapsed in flight
+    for _ in range(2):
+        headers = {**_PUT_HEADERS, "Authorization": f"Bearer {await _bridge._auth.token()}"}
+        async with _http_session.put(url, data=data, headers=headers) as resp:
+            if resp.status != 401:
+                return resp.status in (200, 202, 204)
+    return False
 
 
 async def _api_get_state(device_id):
     """Get a device's current state via direct Afero REST API."""
-    import aiohttp
-    token = await _bridge._auth.token()
-    account_id = _bridge._account_id
-    url = f"https://semantics2.afero.net/v1/accounts/{account_id}/metadevices/{device_id}"
-    async with aiohttp.ClientSession() as sess:
-        async with sess.get(url, headers={
-            "Authorization": f"Bearer {token}",
-        }, params={"expansions": "state"}) as resp:
+    url = f"https://semantics2.afero.net/v1/accounts/{_account_id}/metadevices/{device_id}"
+    for _ in range(2):
+        headers = {"Authorization": f"Bearer {await _bridge._auth.token()}"}
+        async with _http_session.get(url, headers=headers, params={"expansions": "state"}) as resp:
             if resp.status == 200:
                 return await resp.json()
+            if resp.status != 401:
+                break
     return None
 
 
@@ -209,7 +305,7 @@ def turn_on(device_id):
     resolved = get_device_id(device_id)
     if not resolved:
         return {"error": f"Unknown device: {device_id}"}
-    _status_cache.pop(resolved, None)
+    _invalidate(resolved)
 
     async def _do():
         # Try aioafero first
@@ -224,7 +320,7 @@ def turn_on(device_id):
         ok = await _api_set_state(resolved, "power", "on")
         return {"ok": True} if ok else {"error": "API call failed"}
 
-    return _run_async(_do())
+    return _run_async(_written(resolved, _do()))
 
 
 def turn_off(device_id):
@@ -232,7 +328,7 @@ def turn_off(device_id):
     resolved = get_device_id(device_id)
     if not resolved:
         return {"error": f"Unknown device: {device_id}"}
-    _status_cache.pop(resolved, None)
+    _invalidate(resolved)
 
     async def _do():
         try:
@@ -245,7 +341,7 @@ def turn_off(device_id):
         ok = await _api_set_state(resolved, "power", "off")
         return {"ok": True} if ok else {"error": "API call failed"}
 
-    return _run_async(_do())
+    return _run_async(_written(resolved, _do()))
 
 
 def set_brightness(device_id, brightness):
@@ -253,17 +349,16 @@ def set_brightness(device_id, brightness):
     resolved = get_device_id(device_id)
     if not resolved:
         return {"error": f"Unknown device: {device_id}"}
-    _status_cache.pop(resolved, None)
+    _invalidate(resolved)
 
     async def _do():
         if brightness == 0:
             ok = await _api_set_state(resolved, "power", "off")
         else:
-            await _api_set_state(resolved, "power", "on")
-            ok = await _api_set_state(resolved, "brightness", brightness)
+            ok = await _api_set_state_multi(resolved, [("power", "on"), ("brightness", brightness)])
         return {"ok": True} if ok else {"error": "API call failed"}
 
-    return _run_async(_do())
+    return _run_async(_written(resolved, _do()))
 
 
 def set_color(device_id, r, g, b):
@@ -271,14 +366,16 @@ def set_color(device_id, r, g, b):
     resolved = get_device_id(device_id)
     if not resolved:
         return {"error": f"Unknown device: {device_id}"}
-    _status_cache.pop(resolved, None)
+    _invalidate(resolved)
 
     async def _do():
-        await _api_set_state(resolved, "power", "on")
-        ok = await _api_set_state(resolved, "color-rgb", {"color-rgb": {"r": r, "g": g, "b": b}})
+        ok = await _api_set_state_multi(resolved, [
+            ("power", "on"),
+            ("color-rgb", {"color-rgb": {"r": r, "g": g, "b": b}}),
+        ])
         return {"ok": True} if ok else {"error": "API call failed"}
 
-    return _run_async(_do())
+    return _run_async(_written(resolved, _do()))
 
 
 def set_effect(device_id, effect_name):
@@ -286,14 +383,13 @@ def set_effect(device_id, effect_name):
     resolved = get_device_id(device_id)
     if not resolved:
         return {"error": f"Unknown device: {device_id}"}
-    _status_cache.pop(resolved, None)
+    _invalidate(resolved)
 
     async def _do():
-        await _api_set_state(resolved, "power", "on")
-        ok = await _api_set_state(resolved, "color-sequence", effect_name)
+        ok = await _api_set_state_multi(resolved, [("power", "on"), ("color-sequence", effect_name)])
         return {"ok": True} if ok else {"error": "API call failed"}
 
-    return _run_async(_do())
+    return _run_async(_written(resolved, _do()))
 
 
 def set_color_temp(device_id, kelvin):
@@ -301,30 +397,17 @@ def set_color_temp(device_id, kelvin):
     resolved = get_device_id(device_id)
     if not resolved:
         return {"error": f"Unknown device: {device_id}"}
-    _status_cache.pop(resolved, None)
+    _invalidate(resolved)
 
     async def _do():
-        await _api_set_state(resolved, "power", "on")
-        ok = await _api_set_state(resolved, "color-temperature", kelvin)
+        ok = await _api_set_state_multi(resolved, [("power", "on"), ("color-temperature", kelvin)])
         return {"ok": True} if ok else {"error": "API call failed"}
 
-    return _run_async(_do())
-
+    return _run_async(_written(resolved, _do()))
 
-def get_status(device_id):
-    """Get current status of a Hubspace light."""
-    resolved = get_device_id(device_id)
-    if not resolved:
-        return {"error": f"Unknown device: {device_id}"}
-
-    # Check cache
-    cached = _status_cache.get(resolved)
-    if cached and (time.time() - cached["ts"]) < _CACHE_TTL:
-        return cached["data"]
-
-    if not _bridge:
-        return {"on": False, "brightness": 0, "error": "Not connected"}
 
+async def _read_status(resolved):
+    """Read one light's status (aioafero state, else direct API). Uncached."""
     # Try aioafero in-memory state first
     try:
         light = _bridge.lights.get_device(resolved)
@@ -337,42 +420,95 @@ def get_status(device_id):
                 result["color"] = [light.color.r, light.color.g, light.color.b]
             if light.color_mode:
                 result["mode"] = str(light.color_mode)
-            _status_cache[resolved] = {"data": result, "ts": time.time()}
             return result
     except Exception:
         pass
 
     # Fallback: direct API query
-    async def _fetch():
-        raw = await _api_get_state(resolved)
-        if not raw:
-            return {"on": False, "brightness": 0, "error": "API fetch failed"}
-        values = raw.get("state", {}).get("values", [])
-        funcs = {v.get("functionClass"): v.get("value") for v in values}
-        result = {
-            "on": funcs.get("power") == "on",
-            "brightness": funcs.get("brightness", 0) or 0,
-        }
-        color_rgb = funcs.get("color-rgb")
-        if isinstance(color_rgb, dict):
-            rgb = color_rgb.get("color-rgb", color_rgb)
-            result["color"] = [rgb.get("r", 0), rgb.get("g", 0), rgb.get("b", 0)]
-        return result
-
-    result = _run_async(_fetch())
-    if isinstance(result, dict) and "error" not in result:
-        _status_cache[resolved] = {"data": result, "ts": time.time()}
+    raw = await _api_get_state(resolved)
+    if not raw:
+        return {"on": False, "brightness": 0, "error": "API fetch failed"}
+    values = raw.get("state", {}).get("values", [])
+    funcs = {v.get("functionClass"): v.get("value") for v in values}
+    result = {
+        "on": funcs.get("power") == "on",
+        "brightness": funcs.get("brightness", 0) or 0,
+    }
+    color_rgb = funcs.get("color-rgb")
+    if isinstance(color_rgb, dict):
+        rgb = color_rgb.get("color-rgb", color_rgb)
+        result["color"] = [rgb.get("r", 0), rgb.get("g", 0), rgb.get("b", 0)]
     return result
 
 
-def get_all_status():
-    """Get status of all Hubspace lights."""
+async def _fetch_status(resolved):
+    """Cached status read. Concurrent callers for one device share a single fetch."""
+    cached = _cached_status(resolved)
+    if cached is not None:
+        return cached
+
+    seq = _write_seq[resolved]
+    task, task_seq = _inflight.get(resolved, (None, None))
+    if task is None or task_seq != seq:
+        task = asyncio.ensure_future(_read_status(resolved))
+        _inflight[resolved] = (task, seq)
+
+        def _done(t):
+            if _inflight.get(resolved, (None,))[0] is t:
+                del _inflight[resolved]
+            # Only cache if no write landed while the fetch was in flight
+            if (not t.cancelled() and t.exception() is None and "error" not in t.result()
+                    and _write_seq[resolved] == seq):
+                _status_cache[resolved] = {"data": t.result(), "ts": time.time(), "seq": seq}
+
+        task.add_done_callback(_done)
+    return await asyncio.shield(task)
+
+
+def get_status(device_id):
+    """Get current status of a Hubspace light."""
+    resolved = get_device_id(device_id)
+    if not resolved:
+        return {"error": f"Unknown device: {device_id}"}
+
+    # Check cache
+    cached = _cached_status(resolved)
+    if cached is not None:
+        return cached
+
+    if not _bridge:
+        return {"on": False, "brightness": 0, "error": "Not connected"}
+
+    return _run_async(_fetch_status(resolved))
+
+
+async def _status_or_timeout(dev_id):
+    """_fetch_status with a per-device deadline, so one hung light can't sink the batch."""
+    try:
+        return await asyncio.wait_for(_fetch_status(dev_id), timeout=_STATUS_TIMEOUT)
+    except asyncio.TimeoutError:
+        # Only our wait is cancelled; the shared fetch finishes and fills the cache
+        return {"on": False, "brightness": 0, "error": f"timed out after {_STATUS_TIMEOUT}s"}
+
+
+async def _get_all_status_async():
+    """Query every light concurrently on the bridge loop."""
+    statuses = await asyncio.gather(*(_status_or_timeout(dev_id) for dev_id in _light_ids),
+                                    return_exceptions=True)
     result = {}
-    for dev_id, dev_info in _devices.items():
-        if dev_info["type"] == "light":
-            try:
-                status = get_status(dev_id)
-            except Exception as e:
-                status = {"on": False, "brightness": 0, "error": str(e)}
-            result[dev_id] = {**dev_info, **status}
+    for dev_id, status in zip(_light_ids, statuses):
+        if isinstance(status, Exception):
+            status = {"on": False, "brightness": 0, "error": str(status) or type(status).__name__}
+        result[dev_id] = {**_devices[dev_id], **status}
+    return result
+
+
+def get_all_status():
+    """Get status of all Hubspace lights, keyed by device id."""
+    if not _bridge or not _light_ids:
+        return {}
+    result = _run_async(_get_all_status_async(), timeout=15)
+    if "error" in result:  # whole batch failed; report it against every light
+        return {dev_id: {**_devices[dev_id], "on": False, "brightness": 0, "error": result["error"]}
+                for dev_id in _light_ids}
     return result
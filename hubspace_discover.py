@@ -18,6 +18,27 @@ signal.alarm(20)
 env = dotenv_values(os.path.join(os.path.dirname(__file__), ".env"))
 
 
+async def dump(label, controller):
+    """Print one controller's devices and return them as dicts."""
+    devices = []
+    for dev in controller.items:
+        print(f"\n  [{label}] {dev.name}", flush=True)
+        print(f"    ID: {dev.id}", flush=True)
+        info = {}
+        for attr in ["on", "dimming", "color", "color_temperature", "color_mode", "effect", "model"]:
+            val = getattr(dev, attr, None)
+            if val is not None:
+                print(f"    {attr}: {val}", flush=True)
+                info[attr] = str(val)
+        devices.append({
+            "type": label,
+            "name": dev.name,
+            "id": dev.id,
+            **info,
+        })
+    return devices
+
+
 async def discover():
     from aioafero import v1
 
@@ -29,7 +50,8 @@ async def discover():
     )
 
     try:
-        await asyncio.wait_for(bridge.initialize(), timeout=15)
+        # Leave headroom under the 20s alarm for enumeration + close
+        await asyncio.wait_for(bridge.initialize(), timeout=12)
     except asyncio.TimeoutError:
         print("Initialize timed out — trying to read what we got...", flush=True)
     except Exception as e:
@@ -40,28 +62,12 @@ async def discover():
     print(f"  Fans:     {len(bridge.fans.items)}", flush=True)
     print(f"  Switches: {len(bridge.switches.items)}", flush=True)
 
-    all_devices = []
-
-    for label, controller in [
+    results = await asyncio.gather(*(dump(label, controller) for label, controller in [
         ("LIGHT", bridge.lights),
         ("FAN", bridge.fans),
         ("SWITCH", bridge.switches),
-    ]:
-        for dev in controller.items:
-            print(f"\n  [{label}] {dev.name}", flush=True)
-            print(f"    ID: {dev.id}", flush=True)
-            info = {}
-            for attr in ["on", "dimming", "color", "color_temperature", "color_mode", "effect", "model"]:
-                val = getattr(dev, attr, None)
-                if val is not None:
-                    print(f"    {attr}: {val}", flush=True)
-                    info[attr] = str(val)
-            all_devices.append({
-                "type": label,
-                "name": dev.name,
-                "id": dev.id,
-                **info,
-            })
+    ]))
+    all_devices = [dev for devices in results for dev in devices]
 
     # Save for reference
     out_path = os.path.join(os.path.dirname(__file__), "hubspace_devices.json")
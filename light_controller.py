@@ -7,10 +7,13 @@ Called by the Flask app to handle light on/off/brightness/color commands.
 """
 
 import asyncio
-import colorsys
+import concurrent.futures
 import json
 import os
+import sys
+import threading
 import time
+from collections import defaultdict
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -24,6 +27,9 @@ CERTS_DIR = "/home/dp/sports"
 # --- Tuya / Smart Life ---
 import tinytuya
 
+# tinytuya is blocking socket I/O; run it here so the Lutron loop keeps going
+_tuya_exec = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="tuya")
+
 # Light definitions: name -> config
 LIGHTS = {
     "parlor": {
@@ -95,9 +101,48 @@ PRESETS = {
     },
 }
 
-# Status cache: light_id -> {data, timestamp}
+# Status cache: light_id -> {data, timestamp, seq}
 _status_cache = {}
 _CACHE_TTL = 5  # seconds
+_inflight = {}  # light_id -> (asyncio.Task, seq) of a status fetch in progress
+_write_seq = defaultdict(int)  # light_id -> count of commands sent; bumped on every write
+
+# Shared Smartbridge, owned by a persistent event loop in a background thread
+_lutron_bridge = None
+_lutron_connect_lock = asyncio.Lock()
+_LUTRON_CONNECT_TIMEOUT = 4  # seconds; connect() waits forever on an unreachable bridge
+_STATUS_TIMEOUT = 5  # seconds per light read, so get_all_status always returns per-light results
+_lutron_loop = asyncio.new_event_loop()
+if sys.version_info >= (3, 12):
+    _lutron_loop.set_task_factory(asyncio.eager_task_factory)
+_lutron_thread = threading.Thread(target=_lutron_loop.run_forever, daemon=True, name="lutron")
+_lutron_thread.start()
+
+
+def _invalidate(light_id):
+    """Mark a light's cached status stale around a write (see hubspace_controller).
+
+    Called before the command is sent and again once it has finished, so a
+    status read that overlapped the write can't cache the old state.
+    """
+    _write_seq[light_id] += 1
+    _status_cache.pop(light_id, None)
+
+
+async def _written(light_id, coro):
+    """Await a write coroutine, then invalidate again so overlapping reads aren't cached."""
+    try:
+        return await coro
+    finally:
+        _invalidate(light_id)
+
+
+def _cached_status(light_id):
+    """Return cached status if fresh and no write has happened since, else None."""
+    cached = _status_cache.get(light_id)
+    if cached and cached["seq"] == _write_seq[light_id] and (time.time() - cached["ts"]) < _CACHE_TTL:
+        return cached["data"]
+    return None
 
 
 def _get_tuya_bulb(light_cfg):
@@ -113,29 +158,86 @@ def _get_tuya_bulb(light_cfg):
     return d
 
 
-async def _lutron_command(device_id, brightness=None, status_only=False):
-    """Connect to Lutron bridge, run command, disconnect."""
-    bridge = Smartbridge.create_tls(
-        LUTRON_BRIDGE_IP,
-        keyfile=os.path.join(CERTS_DIR, "lutron-key.pem"),
-        certfile=os.path.join(CERTS_DIR, "lutron-cert.pem"),
-        ca_certs=os.path.join(CERTS_DIR, "lutron-bridge-cert.pem"),
-    )
-    await bridge.connect()
+def _submit(coro, timeout=10):
+    """Submit a coroutine to the background loop and wait for result.
+
+    Only for sync callers. Coroutines on the Lutron loop await each other
+    directly (see get_all_status) rather than going back through here.
+    """
+    if threading.current_thread() is _lutron_thread:
+        coro.close()
+        raise RuntimeError("_submit() called from the Lutron loop; await the coroutine instead")
+    future = asyncio.run_coroutine_threadsafe(coro, _lutron_loop)
     try:
-        if status_only:
-            devices = bridge.get_devices()
-            dev = devices.get(device_id, {})
-            level = dev.get("current_state", 0)
-            return {"on": level > 0, "brightness": level}
+        return future.result(timeout=timeout)
+    except Exception as e:
+        future.cancel()
+        return {"error": str(e) or type(e).__name__}
+
+
+async def _get_lutron_bridge():
+    """Return the shared Smartbridge, connecting (or reconnecting) on demand."""
+    global _lutron_bridge
+    async with _lutron_connect_lock:
+        if _lutron_bridge is None or not _lutron_bridge.is_connected():
+            if _lutron_bridge is not None:
+                try:
+                    await _lutron_bridge.close()
+                except Exception:
+                    pass
+            bridge = Smartbridge.create_tls(
+                LUTRON_BRIDGE_IP,
+                keyfile=os.path.join(CERTS_DIR, "lutron-key.pem"),
+                certfile=os.path.join(CERTS_DIR, "lutron-cert.pem"),
+                ca_certs=os.path.join(CERTS_DIR, "lutron-bridge-cert.pem"),
+            )
+            # A failed or cancelled connect leaves the bridge's monitor task
+            # retrying in the background, so close it before giving up
+            try:
+                await asyncio.wait_for(bridge.connect(), timeout=_LUTRON_CONNECT_TIMEOUT)
+            except BaseException as e:
+                _lutron_bridge = None
+                try:
+                    await bridge.close()
+                except Exception:
+                    pass
+                if isinstance(e, asyncio.TimeoutError):
+                    raise asyncio.TimeoutError(
+                        f"Lutron bridge {LUTRON_BRIDGE_IP} not reachable") from None
+                raise
+            _lutron_bridge = bridge
+    return _lutron_bridge
+
+
+async def _lutron_command(device_id, brightness=None, status_only=False):
+    """Run a command against the shared Lutron bridge connection."""
+    bridge = await _get_lutron_bridge()
+    if status_only:
+        devices = bridge.get_devices()
+        dev = devices.get(device_id, {})
+        level = dev.get("current_state", 0)
+        return {"on": level > 0, "brightness": level}
+    else:
+        if brightness == 0:
+            await bridge.turn_off(device_id)
         else:
-            if brightness == 0:
-                await bridge.turn_off(device_id)
-            else:
-                await bridge.set_value(device_id, brightness)
-            return {"ok": True}
-    finally:
-        await bridge.close()
+            await bridge.set_value(device_id, brightness)
+        return {"ok": True}
+
+
+def _rgb_to_hue_sat(r, g, b):
+    """RGB (0-255 ints) -> (hue 0-360, saturation 0-100), as colorsys would give."""
+    mx = max(r, g, b)
+    delta = mx - min(r, g, b)
+    if delta == 0:
+        return 0.0, 0.0
+    if mx == r:
+        h = 60 * (g - b) / delta % 360
+    elif mx == g:
+        h = 120 + 60 * (b - r) / delta
+    else:
+        h = 240 + 60 * (r - g) / delta
+    return h, delta * 100 / mx
 
 
 def _tuya_set(light_cfg, brightness, color=None):
@@ -152,9 +254,9 @@ def _tuya_set(light_cfg, brightness, color=None):
         if color and len(color) == 3:
             r, g, b = color
             # Convert RGB to HSV, use brightness as the V (value) component
-            h, s, v = colorsys.rgb_to_hsv(r / 255, g / 255, b / 255)
+            h, s = _rgb_to_hue_sat(r, g, b)
             # set_hsv: h=0-360, s=0-100, v=0-100
-            d.set_hsv(h * 360, s * 100, max(1, brightness))
+            d.set_hsv(h, s, max(1, brightness))
         else:
             # White mode — Tuya brightness range is 10-1000
             tuya_brightness = max(10, int(brightness * 10))
@@ -190,22 +292,17 @@ def _tuya_get_status(light_cfg):
         if mode == "colour":
             # In colour mode, brightness is the V in HSV stored in DPS 5/24
             colour_data = dps.get("5", "") or dps.get("24", "")
+            brightness = 50
             try:
                 # tinytuya colour format ends with HHHSSSVVV (each 0-1000 as hex)
                 # V is the last 4 hex chars
-                v_raw = int(colour_data[-4:], 16) if len(colour_data) >= 4 else 0
-                brightness = max(0, min(100, int(v_raw / 10)))
+                v_raw = int.from_bytes(bytes.fromhex(colour_data[-4:]), "big") if len(colour_data) >= 4 else 0
+                brightness = max(0, min(100, v_raw // 10))
+                # Extract RGB: format A starts with RRGGBB hex
+                if len(colour_data) >= 6:
+                    color = list(bytes.fromhex(colour_data[:6]))
             except (ValueError, TypeError):
-                brightness = 50
-            # Extract RGB: format A starts with RRGGBB hex
-            if colour_data and len(colour_data) >= 6:
-                try:
-                    r = int(colour_data[0:2], 16)
-                    g = int(colour_data[2:4], 16)
-                    b = int(colour_data[4:6], 16)
-                    color = [r, g, b]
-                except (ValueError, TypeError):
-                    pass
+                pass
         else:
             # White mode — DPS 3 or 22 is brightness (10-1000)
             raw_brightness = dps.get("3", 0) or dps.get("22", 0)
@@ -226,13 +323,28 @@ def set_light(light_id, brightness, color=None):
         return {"error": f"Unknown light: {light_id}"}
 
     # Invalidate cache on set
-    _status_cache.pop(light_id, None)
+    _invalidate(light_id)
 
     if light["system"] == "lutron":
-        return asyncio.run(_lutron_command(light["device_id"], brightness=brightness))
+        return _submit(_written(light_id, _lutron_command(light["device_id"], brightness=brightness)))
     elif light["system"] == "tuya":
-        return _tuya_set(light, brightness, color=color)
+        try:
+            return _tuya_set(light, brightness, color=color)
+        finally:
+            _invalidate(light_id)
+
+    return {"error": f"Unknown system: {light['system']}"}
+
 
+async def _set_light_async(light_id, brightness, color=None):
+    """Async variant of set_light for batches; Tuya writes run on the Tuya pool."""
+    light = LIGHTS[light_id]
+    _invalidate(light_id)
+    if light["system"] == "lutron":
+        return await _written(light_id, _lutron_command(light["device_id"], brightness=brightness))
+    elif light["system"] == "tuya":
+        loop = asyncio.get_running_loop()
+        return await _written(light_id, loop.run_in_executor(_tuya_exec, _tuya_set, light, brightness, color))
     return {"error": f"Unknown system: {light['system']}"}
 
 
@@ -241,8 +353,11 @@ def set_color(light_id, r, g, b):
     light = LIGHTS.get(light_id)
     if not light or light["system"] != "tuya":
         return {"error": "Color only supported on Tuya lights"}
-    _status_cache.pop(light_id, None)
-    return _tuya_set_color_only(light, r, g, b)
+    _invalidate(light_id)
+    try:
+        return _tuya_set_color_only(light, r, g, b)
+    finally:
+        _invalidate(light_id)
 
 
 def get_light_status(light_id):
@@ -252,29 +367,65 @@ def get_light_status(light_id):
         return {"error": f"Unknown light: {light_id}"}
 
     # Check cache
-    cached = _status_cache.get(light_id)
-    if cached and (time.time() - cached["ts"]) < _CACHE_TTL:
-        return cached["data"]
+    cached = _cached_status(light_id)
+    if cached is not None:
+        return cached
+
+    return _submit(_light_status_async(light_id))
+
 
+async def _read_light_status(light_id):
+    """Query one light directly. Tuya reads run on the Tuya thread pool."""
+    light = LIGHTS[light_id]
     if light["system"] == "lutron":
-        result = asyncio.run(_lutron_command(light["device_id"], status_only=True))
+        read = _lutron_command(light["device_id"], status_only=True)
     elif light["system"] == "tuya":
-        result = _tuya_get_status(light)
+        read = asyncio.get_running_loop().run_in_executor(_tuya_exec, _tuya_get_status, light)
     else:
-        result = {"error": f"Unknown system: {light['system']}"}
+        return {"error": f"Unknown system: {light['system']}"}
+    try:
+        return await asyncio.wait_for(read, timeout=_STATUS_TIMEOUT)
+    except asyncio.TimeoutError as e:
+        if str(e):  # already explained, e.g. bridge not reachable
+            raise
+        raise asyncio.TimeoutError(f"{light['name']} timed out after {_STATUS_TIMEOUT}s") from None
 
-    _status_cache[light_id] = {"data": result, "ts": time.time()}
-    return result
+
+async def _light_status_async(light_id):
+    """Cached status read on the Lutron loop. Concurrent callers share one fetch."""
+    cached = _cached_status(light_id)
+    if cached is not None:
+        return cached
+
+    seq = _write_seq[light_id]
+    task, task_seq = _inflight.get(light_id, (None, None))
+    if task is None or task_seq != seq:
+        task = asyncio.ensure_future(_read_light_status(light_id))
+        _inflight[light_id] = (task, seq)
+
+        def _done(t):
+            if _inflight.get(light_id, (None,))[0] is t:
+                del _inflight[light_id]
+            if not t.cancelled() and t.exception() is None and _write_seq[light_id] == seq:
+                _status_cache[light_id] = {"data": t.result(), "ts": time.time(), "seq": seq}
+
+        task.add_done_callback(_done)
+    return await asyncio.shield(task)
 
 
 def get_all_status():
-    """Get status of all lights. Each device is queried independently so one failure doesn't block others."""
+    """Get status of all lights. Devices are queried concurrently so one slow or failed light doesn't block others."""
+    async def _all():
+        return await asyncio.gather(*(_light_status_async(light_id) for light_id in LIGHTS),
+                                    return_exceptions=True)
+
+    statuses = _submit(_all(), timeout=15)
+    if isinstance(statuses, dict):  # whole batch failed or timed out
+        statuses = [{"on": False, "brightness": 0, **statuses}] * len(LIGHTS)
     result = {}
-    for light_id, light in LIGHTS.items():
-        try:
-            status = get_light_status(light_id)
-        except Exception as e:
-            status = {"on": False, "brightness": 0, "error": str(e)}
+    for (light_id, light), status in zip(LIGHTS.items(), statuses):
+        if isinstance(status, Exception):
+            status = {"on": False, "brightness": 0, "error": str(status) or type(status).__name__}
         result[light_id] = {
             "name": light["name"],
             "system": light["system"],
@@ -290,11 +441,17 @@ def apply_preset(preset_id):
     if not preset:
         return {"error": f"Unknown preset: {preset_id}"}
 
-    for light_id in ["parlor", "octagon", "kitchen_left", "kitchen_right"]:
-        cfg = preset.get(light_id, {})
-        brightness = cfg.get("brightness", 0)
-        color = cfg.get("color", None)
-        set_light(light_id, brightness, color=color)
+    # All four lights are independent, so send the commands concurrently
+    async def _all():
+        tasks = []
+        for light_id in ["parlor", "octagon", "kitchen_left", "kitchen_right"]:
+            cfg = preset.get(light_id, {})
+            brightness = cfg.get("brightness", 0)
+            color = cfg.get("color", None)
+            tasks.append(_set_light_async(light_id, brightness, color=color))
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    _submit(_all(), timeout=15)
 
     return {"status": "ok", "preset": preset_id}
 
@@ -12,6 +12,7 @@ Endpoints:
   POST /lights/<id>    — Control Caseta/Tuya light brightness
   GET  /hubspace       — JSON status of all Hubspace lights
   POST /hubspace/<id>  — Control Hubspace light (brightness, color, effects)
+  GET  /events         — Server-Sent Events stream of score alerts
   GET  /api/sports     — ESPN scores proxy (cached 60s)
   GET  /api/station    — WS-2902 weather station data (Ambient Weather API)
   POST /api/display    — Screen on/off via wlopm
@@ -23,29 +24,60 @@ Usage:
 from flask import Flask, request, jsonify, render_template, Response
 from datetime import datetime
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import light_controller
 import hubspace_controller
+import hashlib
+import itertools
+import re
 import subprocess
+import threading
 import time
 import urllib.request
 import json
 import os
 
+# orjson parses the large ESPN scoreboards and serializes responses much
+# faster; stdlib json as fallback
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
 load_dotenv()
 
 app = Flask(__name__)
 
 # Store last 50 alerts in memory
-alerts = deque(maxlen=50)
-
-# Counter for unique alert IDs
-alert_counter = 0
-
-# Sports cache
-_sports_cache = {"data": None, "ts": 0}
+ALERTS_MAX = 50
+alerts = deque(maxlen=ALERTS_MAX)
+
+# Unique, increasing alert IDs. IDs are taken under _alerts_lock together
+# with the appendleft, so the deque is always newest-first by alert_id.
+alert_counter = itertools.count(1)
+_alerts_lock = threading.Lock()
+# Notified (under _alerts_lock) whenever an alert is added; wakes /events streams
+_alerts_cond = threading.Condition(_alerts_lock)
+_EVENTS_KEEPALIVE = 15  # seconds between SSE comments on an idle stream
+# Newest alert_id handed out, so an up-to-date poll can answer without a scan
+_latest_alert_id = 0
+_NO_ALERTS = _dumps({"alerts": []})
+
+# Sports cache — filled by the background refresher, requests only read it.
+# "body" holds the serialized /api/sports response so polls don't re-encode.
+_sports_cache = {"data": None, "body": None, "ts": 0}
 _SPORTS_CACHE_TTL = 60  # seconds
 
+# Guards writes to the sports/station/webcam caches. Readers take a
+# snapshot of the dict values without locking (single assignments are atomic).
+_cache_lock = threading.Lock()
+
 # Priority teams for Portland area
 PRIORITY_TEAMS = {
     "trail blazers", "blazers", "portland trail blazers",
@@ -55,6 +87,8 @@ PRIORITY_TEAMS = {
     "portland fire",
     "oregon state beavers", "oregon state",
 }
+# One C-level scan per team name instead of a Python loop over PRIORITY_TEAMS
+_PRIORITY_RE = re.compile("|".join(map(re.escape, sorted(PRIORITY_TEAMS, key=len, reverse=True))))
 
 # ESPN league endpoints (public, no auth needed)
 ESPN_LEAGUES = {
@@ -70,44 +104,46 @@ ESPN_LEAGUES = {
 
 
 def _fetch_espn_league(sport_path):
-    """Fetch scoreboard from ESPN public API for one league."""
+    """Fetch one league's scoreboard from ESPN's public API; return its events list.
+
+    Only "events" is kept — the rest of the payload (league calendars etc.) is
+    dropped right after parsing instead of being held until the refresh ends.
+    """
     url = f"https://site.api.espn.com/apis/site/v2/sports/{sport_path}/scoreboard"
     try:
         req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
         with urllib.request.urlopen(req, timeout=5) as resp:
-            return json.loads(resp.read())
+            return _loads(resp.read()).get("events") or None
     except Exception:
         return None
 
 
-def _parse_games(league_key, data):
-    """Parse ESPN scoreboard JSON into simplified game objects."""
-    if not data or "events" not in data:
+def _parse_games(league_key, events):
+    """Parse ESPN scoreboard events into simplified game objects."""
+    if not events:
         return []
     games = []
-    for event in data["events"]:
+    for event in events:
         comp = event.get("competitions", [{}])[0]
-        competitors = comp.get("competitors", [])
-        if len(competitors) < 2:
+        competitors = comp.get("competitors") or ()
+        if len(competitors) != 2:
             continue
-
-        home = away = None
-        for c in competitors:
-            if c.get("homeAway") == "home":
-                home = c
-            else:
-                away = c
-        if not home or not away:
-            continue
-
-        home_name = home.get("team", {}).get("displayName", "")
-        away_name = away.get("team", {}).get("displayName", "")
-        home_abbr = home.get("team", {}).get("abbreviation", "")
-        away_abbr = away.get("team", {}).get("abbreviation", "")
+        c0, c1 = competitors
+        c0_home = c0.get("homeAway") == "home"
+        if c0_home == (c1.get("homeAway") == "home"):
+            continue  # need exactly one home side, as the old home/away lookup did
+        home, away = (c0, c1) if c0_home else (c1, c0)
+
+        home_team = home.get("team") or {}
+        away_team = away.get("team") or {}
+        home_name = home_team.get("displayName", "")
+        away_name = away_team.get("displayName", "")
+        home_abbr = home_team.get("abbreviation", "")
+        away_abbr = away_team.get("abbreviation", "")
         home_score = home.get("score", "0")
         away_score = away.get("score", "0")
-        home_logo = home.get("team", {}).get("logo", "")
-        away_logo = away.get("team", {}).get("logo", "")
+        home_logo = home_team.get("logo", "")
+        away_logo = away_team.get("logo", "")
         home_record = ""
         away_record = ""
         home_rank = 99
@@ -147,13 +183,10 @@ def _parse_games(league_key, data):
         for b in comp.get("broadcasts", []):
             broadcasts.extend(b.get("names", []))
 
-        # Check if this is a priority team
-        is_priority = (
-            home_name.lower() in PRIORITY_TEAMS
-            or away_name.lower() in PRIORITY_TEAMS
-            or any(t in home_name.lower() for t in PRIORITY_TEAMS)
-            or any(t in away_name.lower() for t in PRIORITY_TEAMS)
-        )
+        # Check if this is a priority team (substring match covers exact names too)
+        home_lower = home_name.lower()
+        away_lower = away_name.lower()
+        is_priority = bool(_PRIORITY_RE.search(home_lower) or _PRIORITY_RE.search(away_lower))
 
         games.append({
             "league": league_key.upper(),
@@ -171,31 +204,48 @@ def _parse_games(league_key, data):
     return games
 
 
-def _get_sports_data():
-    """Fetch all leagues, parse, sort by priority. Cached for 60s."""
+_STATE_ORDER = {"in": 0, "pre": 1, "post": 2}
+
+
+def _game_sort_key(g):
+    """Sort: live games first, then by best team ranking (lower = better).
+    Priority Portland teams always float to top when live.
+    """
+    home_rank = g["home"]["rank"]
+    away_rank = g["away"]["rank"]
+    return (
+        _STATE_ORDER.get(g["state"], 3),
+        not g["priority"],
+        home_rank if home_rank < away_rank else away_rank,
+        g["date"],
+    )
+
+
+def _refresh_sports():
+    """Fetch all leagues, parse, sort by priority, and store in _sports_cache."""
     now = time.time()
-    if _sports_cache["data"] is not None and (now - _sports_cache["ts"]) < _SPORTS_CACHE_TTL:
-        return _sports_cache["data"]
+
+    # Fetch all leagues in parallel — wall time is the slowest league, not the sum
+    with ThreadPoolExecutor(max_workers=len(ESPN_LEAGUES)) as ex:
+        results = list(ex.map(_fetch_espn_league, ESPN_LEAGUES.values()))
 
     all_games = []
-    for league_key, sport_path in ESPN_LEAGUES.items():
-        raw = _fetch_espn_league(sport_path)
-        if raw:
-            all_games.extend(_parse_games(league_key, raw))
-
-    # Sort: live games first, then by best team ranking (lower = better)
-    # Priority Portland teams always float to top when live
-    state_order = {"in": 0, "pre": 1, "post": 2}
-    all_games.sort(key=lambda g: (
-        state_order.get(g["state"], 3),
-        0 if g["priority"] else 1,
-        min(g["home"].get("rank", 99), g["away"].get("rank", 99)),
-        g["date"],
-    ))
+    for league_key, events in zip(ESPN_LEAGUES, results):
+        if events:
+            all_games.extend(_parse_games(league_key, events))
 
-    _sports_cache["data"] = all_games
-    _sports_cache["ts"] = now
-    return all_games
+    all_games.sort(key=_game_sort_key)
+    body = _dumps({"games": all_games})
+
+    with _cache_lock:
+        _sports_cache["data"] = all_games
+        _sports_cache["body"] = body
+        _sports_cache["ts"] = now
+
+
+def _json_response(body):
+    """Wrap already-serialized JSON bytes in a Response."""
+    return Response(body, mimetype="application/json")
 
 
 @app.route("/")
@@ -219,56 +269,98 @@ def scores():
 @app.route("/score-update", methods=["POST"])
 def score_update():
     """Receive a score alert from the Pi 400 tracker."""
-    global alert_counter
-
+    global _latest_alert_id
     data = request.get_json()
     if not data:
         return jsonify({"error": "No JSON body"}), 400
 
-    alert_counter += 1
-    data["alert_id"] = alert_counter
     data["received_at"] = datetime.now().isoformat()
+    alert_types = data.get("alert_types", [])
 
-    alerts.appendleft(data)
+    with _alerts_lock:
+        aid = next(alert_counter)
+        data["alert_id"] = aid
+        alerts.appendleft(data)
+        _latest_alert_id = aid
+        _alerts_cond.notify_all()
+
+        # Count live (non-final) games while the deque can't change under us
+        live_games = set()
+        if "FINAL" not in alert_types:
+            for a in alerts:
+                if "FINAL" not in a.get("alert_types", []):
+                    live_games.add(a.get("game_id"))
 
     home = data.get("home_abbr", "???")
     away = data.get("away_abbr", "???")
-    types = ", ".join(data.get("alert_types", []))
-    print(f"[ALERT #{alert_counter}] {types}: {away} {data.get('away_score', '?')} @ {home} {data.get('home_score', '?')}")
+    types = ", ".join(alert_types)
+    print(f"[ALERT #{aid}] {types}: {away} {data.get('away_score', '?')} @ {home} {data.get('home_score', '?')}")
 
     # Score-to-brightness sync: if exactly one live game, adjust parlor/octagon
-    alert_types = data.get("alert_types", [])
-    if "FINAL" not in alert_types:
-        # Count live (non-final) games
-        live_games = set()
-        for a in alerts:
-            if "FINAL" not in a.get("alert_types", []):
-                live_games.add(a.get("game_id"))
-        if len(live_games) == 1:
-            home_score = data.get("home_score", 0)
-            away_score = data.get("away_score", 0)
-            result = light_controller.apply_score_brightness(home_score, away_score)
-            print(f"  [LIGHTS] Score sync: parlor={result['parlor']}%, octagon={result['octagon']}% (delta={result['delta']})")
+    if len(live_games) == 1:
+        home_score = data.get("home_score", 0)
+        away_score = data.get("away_score", 0)
+        result = light_controller.apply_score_brightness(home_score, away_score)
+        print(f"  [LIGHTS] Score sync: parlor={result['parlor']}%, octagon={result['octagon']}% (delta={result['delta']})")
+
+    return jsonify({"status": "ok", "alert_id": aid})
+
 
-    return jsonify({"status": "ok", "alert_id": alert_counter})
+def _alerts_since(since_id):
+    """Alerts newer than since_id, newest first. Caller holds _alerts_lock."""
+    # Newest first with increasing IDs: stop at the first alert already seen
+    new_alerts = []
+    for a in alerts:
+        if a["alert_id"] <= since_id:
+            break
+        new_alerts.append(a)
+    return new_alerts
 
 
 @app.route("/updates")
 def updates():
     """Return recent alerts as JSON. Frontend polls this."""
     since_id = request.args.get("since", 0, type=int)
-    new_alerts = [a for a in alerts if a.get("alert_id", 0) > since_id]
-    return jsonify({"alerts": new_alerts})
+    # Most polls are already up to date: skip the lock, scan and encode
+    if since_id >= _latest_alert_id:
+        return _json_response(_NO_ALERTS)
+    with _alerts_lock:
+        new_alerts = _alerts_since(since_id)
+    return _json_response(_dumps({"alerts": new_alerts}))
+
+
+@app.route("/events")
+def events():
+    """Push new alerts as Server-Sent Events instead of having clients poll /updates."""
+    since_id = request.headers.get("Last-Event-ID", type=int)
+    if since_id is None:
+        since_id = request.args.get("since", 0, type=int)
+
+    def stream():
+        last = since_id
+        while True:
+            with _alerts_cond:
+                _alerts_cond.wait_for(lambda: alerts and alerts[0]["alert_id"] > last,
+                                      timeout=_EVENTS_KEEPALIVE)
+                new_alerts = _alerts_since(last)
+            if not new_alerts:
+                # Comment line keeps proxies open and lets us notice closed clients
+                yield ": keepalive\n\n"
+                continue
+            for a in reversed(new_alerts):
+                yield f"id: {a['alert_id']}\ndata: {_dumps(a).decode()}\n\n"
+            last = new_alerts[0]["alert_id"]
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache"})
 
 
 @app.route("/test-alert", methods=["POST"])
 def test_alert():
     """Send a fake alert for testing when no games are live."""
-    global alert_counter
-    alert_counter += 1
-
+    global _latest_alert_id
+    now_iso = datetime.now().isoformat()
     fake = {
-        "alert_id": alert_counter,
         "game_id": "test-001",
         "home_team": "Duke Blue Devils",
         "home_abbr": "DUKE",
@@ -285,12 +377,17 @@ def test_alert():
         "status_detail": "5:32 - 2nd Half",
         "clock": "5:32",
         "period": 2,
-        "timestamp": datetime.now().isoformat(),
-        "received_at": datetime.now().isoformat(),
+        "timestamp": now_iso,
+        "received_at": now_iso,
     }
-    alerts.appendleft(fake)
-    print(f"[TEST ALERT #{alert_counter}] UNC 70 @ DUKE 72")
-    return jsonify({"status": "ok", "alert_id": alert_counter})
+    with _alerts_lock:
+        aid = next(alert_counter)
+        fake["alert_id"] = aid
+        alerts.appendleft(fake)
+        _latest_alert_id = aid
+        _alerts_cond.notify_all()
+    print(f"[TEST ALERT #{aid}] UNC 70 @ DUKE 72")
+    return jsonify({"status": "ok", "alert_id": aid})
 
 
 @app.route("/lights")
@@ -389,9 +486,32 @@ def hubspace_color(device_id):
 
 @app.route("/api/sports")
 def api_sports():
-    """ESPN scores proxy. Returns prioritized games list, cached 60s."""
-    games = _get_sports_data()
-    return jsonify({"games": games})
+    """ESPN scores proxy. Returns prioritized games list, refreshed every 60s."""
+    return _json_response(_sports_cache["body"] or b'{"games":[]}')
+
+
+# Long-lived shell that runs wlopm for each line written to its stdin, so a
+# display toggle doesn't fork the (large, multi-threaded) Flask process
+_WLOPM_LOOP = 'while read -r flag; do wlopm "$flag" DSI-1; done'
+_wlopm = None
+_wlopm_lock = threading.Lock()
+
+
+def _set_display(flag):
+    """Send --on/--off to the wlopm helper, falling back to a one-off run."""
+    global _wlopm
+    with _wlopm_lock:
+        try:
+            if _wlopm is None or _wlopm.poll() is not None:
+                _wlopm = subprocess.Popen(["bash", "-c", _WLOPM_LOOP],
+                                          stdin=subprocess.PIPE, text=True)
+            _wlopm.stdin.write(flag + "\n")
+            _wlopm.stdin.flush()
+            return
+        except OSError as e:
+            print(f"[display] wlopm helper failed, running directly: {e}")
+            _wlopm = None
+    subprocess.run(["wlopm", flag, "DSI-1"], timeout=5)
 
 
 @app.route("/api/display", methods=["POST"])
@@ -402,25 +522,19 @@ def api_display():
         return jsonify({"error": "Need action: on or off"}), 400
 
     action = data["action"]
-    if action == "off":
-        try:
-            subprocess.run(["wlopm", "--off", "DSI-1"], timeout=5)
-            return jsonify({"status": "ok", "display": "off"})
-        except Exception as e:
-            return jsonify({"error": str(e)}), 500
-    elif action == "on":
-        try:
-            subprocess.run(["wlopm", "--on", "DSI-1"], timeout=5)
-            return jsonify({"status": "ok", "display": "on"})
-        except Exception as e:
-            return jsonify({"error": str(e)}), 500
-    else:
+    if action not in ("on", "off"):
         return jsonify({"error": "action must be 'on' or 'off'"}), 400
+    try:
+        _set_display("--" + action)
+        return jsonify({"status": "ok", "display": action})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
 
-# Webcam image cache: source -> {data, ts}
+# Webcam image cache: source -> {data, ts, requested}
 _webcam_cache = {}
 _WEBCAM_CACHE_TTL = 30  # seconds
+_WEBCAM_IDLE = 300  # stop background refresh of a source not requested for this long
 
 _WEBCAM_SOURCES = {
     "spirit": "https://portlandweather.com/assets/images/cameras/PortlandSpiritLiveCam.jpeg",
@@ -428,34 +542,70 @@ _WEBCAM_SOURCES = {
 }
 
 
+def _fetch_webcam(url):
+    """Download one webcam JPEG."""
+    req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        return resp.read()
+
+
+def _webcam_entry(data, ts, requested):
+    """Build a webcam cache entry; the ETag is hashed once here, not per request."""
+    return {"data": data, "etag": hashlib.md5(data).hexdigest(), "ts": ts, "requested": requested}
+
+
+def _webcam_response(entry):
+    """Serve a cached image, or 304 if the browser already has this ETag."""
+    if entry["etag"] in request.if_none_match:
+        resp = Response(status=304)
+    else:
+        resp = Response(entry["data"], mimetype="image/jpeg")
+    resp.set_etag(entry["etag"])
+    resp.headers["Cache-Control"] = "public, max-age=30"
+    return resp
+
+
+def _refresh_webcams():
+    """Re-download webcam images that a client has asked for recently."""
+    now = time.time()
+    for source, entry in list(_webcam_cache.items()):
+        if now - entry["requested"] > _WEBCAM_IDLE or now - entry["ts"] < _WEBCAM_CACHE_TTL:
+            continue
+        try:
+            data = _fetch_webcam(_WEBCAM_SOURCES[source])
+        except Exception:
+            continue
+        with _cache_lock:
+            _webcam_cache[source] = _webcam_entry(data, time.time(), entry["requested"])
+
+
 @app.route("/api/webcam")
 def api_webcam():
-    """Proxy webcam images to avoid CORS issues. Cached 30s."""
+    """Proxy webcam images to avoid CORS issues. Cached 30s, kept warm in the background."""
     source = request.args.get("source", "spirit")
-    url = _WEBCAM_SOURCES.get(source, _WEBCAM_SOURCES["spirit"])
+    if source not in _WEBCAM_SOURCES:
+        source = "spirit"
+    url = _WEBCAM_SOURCES[source]
 
     now = time.time()
     cached = _webcam_cache.get(source)
-    if cached and (now - cached["ts"]) < _WEBCAM_CACHE_TTL:
-        return Response(cached["data"], mimetype="image/jpeg",
-                        headers={"Cache-Control": "public, max-age=30"})
+    if cached:
+        cached["requested"] = now
+        if (now - cached["ts"]) < _WEBCAM_CACHE_TTL:
+            return _webcam_response(cached)
 
     try:
-        req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            data = resp.read()
-            _webcam_cache[source] = {"data": data, "ts": now}
-            return Response(data, mimetype="image/jpeg",
-                            headers={"Cache-Control": "public, max-age=30"})
+        entry = _webcam_entry(_fetch_webcam(url), now, now)
+        with _cache_lock:
+            _webcam_cache[source] = entry
+        return _webcam_response(entry)
     except Exception as e:
         # Try fallback
         for alt_source, alt_url in _WEBCAM_SOURCES.items():
             if alt_source != source:
                 try:
-                    req = urllib.request.Request(alt_url, headers={"User-Agent": "Mozilla/5.0"})
-                    with urllib.request.urlopen(req, timeout=10) as resp:
-                        data = resp.read()
-                        return Response(data, mimetype="image/jpeg")
+                    data = _fetch_webcam(alt_url)
+                    return Response(data, mimetype="image/jpeg")
                 except Exception:
                     pass
         return Response("", status=404)
@@ -465,10 +615,58 @@ def api_webcam():
 _AW_API_KEY = os.environ.get("AW_API_KEY", "")
 _AW_APP_KEY = os.environ.get("AW_APP_KEY", "")
 _AW_MAC = os.environ.get("AW_MAC", "C8:C9:A3:16:AA:F9")
-_station_cache = {"data": None, "ts": 0}
+_station_cache = {"data": None, "body": None, "ts": 0}  # filled by the background refresher
 _STATION_CACHE_TTL = 60  # seconds
 
 
+def _safe_float(v):
+    # Ambient Weather sends plain numbers; only strings/odd types need parsing
+    if isinstance(v, (int, float)):
+        return float(v)
+    if v is None:
+        return None
+    try:
+        return float(v)
+    except (ValueError, TypeError):
+        return None
+
+
+def _safe_int(v):
+    if isinstance(v, int):
+        return int(v)
+    if v is None:
+        return None
+    try:
+        return int(float(v))
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+
+# (output key, Ambient Weather field, converter) for the "latest" reading
+_AW_LATEST_FIELDS = (
+    ("temp_f", "tempf", _safe_float),
+    ("feels_like_f", "feelsLike", _safe_float),
+    ("dew_point_f", "dewPoint", _safe_float),
+    ("humidity", "humidity", _safe_int),
+    ("temp_in_f", "tempinf", _safe_float),
+    ("humidity_in", "humidityin", _safe_int),
+    ("pressure_rel", "baromrelin", _safe_float),
+    ("pressure_abs", "baromabsin", _safe_float),
+    ("wind_speed", "windspeedmph", _safe_float),
+    ("wind_gust", "windgustmph", _safe_float),
+    ("wind_dir", "winddir", _safe_int),
+    ("max_daily_gust", "maxdailygust", _safe_float),
+    ("hourly_rain", "hourlyrainin", _safe_float),
+    ("daily_rain", "dailyrainin", _safe_float),
+    ("weekly_rain", "weeklyrainin", _safe_float),
+    ("monthly_rain", "monthlyrainin", _safe_float),
+    ("yearly_rain", "yearlyrainin", _safe_float),
+    ("solar_radiation", "solarradiation", _safe_float),
+    ("uv", "uv", _safe_int),
+    ("battery", "battout", _safe_int),
+)
+
+
 def _fetch_ambient_weather():
     """Fetch latest data from Ambient Weather REST API."""
     if not _AW_APP_KEY:
@@ -480,36 +678,19 @@ def _fetch_ambient_weather():
     try:
         req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
         with urllib.request.urlopen(req, timeout=8) as resp:
-            raw = json.loads(resp.read())
+            raw = _loads(resp.read())
         if not raw or not isinstance(raw, list):
             return None
         # raw is a list of readings, newest first
         latest = raw[0]
+        latest_out = {
+            "received_at": datetime.now().isoformat(),
+            "dateutc": latest.get("dateutc", ""),
+        }
+        for key, aw_key, conv in _AW_LATEST_FIELDS:
+            latest_out[key] = conv(latest.get(aw_key))
         return {
-            "latest": {
-                "received_at": datetime.now().isoformat(),
-                "dateutc": latest.get("dateutc", ""),
-                "temp_f": _safe_float(latest.get("tempf")),
-                "feels_like_f": _safe_float(latest.get("feelsLike")),
-                "dew_point_f": _safe_float(latest.get("dewPoint")),
-                "humidity": _safe_int(latest.get("humidity")),
-                "temp_in_f": _safe_float(latest.get("tempinf")),
-                "humidity_in": _safe_int(latest.get("humidityin")),
-                "pressure_rel": _safe_float(latest.get("baromrelin")),
-                "pressure_abs": _safe_float(latest.get("baromabsin")),
-                "wind_speed": _safe_float(latest.get("windspeedmph")),
-                "wind_gust": _safe_float(latest.get("windgustmph")),
-                "wind_dir": _safe_int(latest.get("winddir")),
-                "max_daily_gust": _safe_float(latest.get("maxdailygust")),
-                "hourly_rain": _safe_float(latest.get("hourlyrainin")),
-                "daily_rain": _safe_float(latest.get("dailyrainin")),
-                "weekly_rain": _safe_float(latest.get("weeklyrainin")),
-                "monthly_rain": _safe_float(latest.get("monthlyrainin")),
-                "yearly_rain": _safe_float(latest.get("yearlyrainin")),
-                "solar_radiation": _safe_float(latest.get("solarradiation")),
-                "uv": _safe_int(latest.get("uv")),
-                "battery": _safe_int(latest.get("battout")),
-            },
+            "latest": latest_out,
             "history": [
                 {
                     "dateutc": r.get("dateutc", ""),
@@ -528,37 +709,45 @@ def _fetch_ambient_weather():
         return None
 
 
-@app.route("/api/station")
-def api_station():
-    """Serve latest WS-2902 data from Ambient Weather cloud API. Cached 60s."""
-    now = time.time()
-    if _station_cache["data"] is not None and (now - _station_cache["ts"]) < _STATION_CACHE_TTL:
-        return jsonify(_station_cache["data"])
-
+def _refresh_station():
+    """Fetch Ambient Weather data into _station_cache; keep the old data on failure."""
     data = _fetch_ambient_weather()
     if data:
-        _station_cache["data"] = data
-        _station_cache["ts"] = now
-        return jsonify(data)
+        body = _dumps(data)
+        with _cache_lock:
+            _station_cache["data"] = data
+            _station_cache["body"] = body
+            _station_cache["ts"] = time.time()
 
-    # Return cached even if stale, or empty
-    if _station_cache["data"]:
-        return jsonify(_station_cache["data"])
+
+@app.route("/api/station")
+def api_station():
+    """Serve latest WS-2902 data from Ambient Weather cloud API. Refreshed every 60s."""
+    body = _station_cache["body"]
+    if body:
+        return _json_response(body)
     return jsonify({"latest": None, "history": [], "count": 0, "error": "No data yet — check API keys"})
 
 
-def _safe_float(v):
-    try:
-        return float(v) if v is not None else None
-    except (ValueError, TypeError):
-        return None
+def _refresh_loop():
+    """Background thread: keep the sports, station and webcam caches warm."""
+    while True:
+        now = time.time()
+        if now - _sports_cache["ts"] >= _SPORTS_CACHE_TTL:
+            try:
+                _refresh_sports()
+            except Exception as e:
+                print(f"Sports refresh error: {e}")
+        if now - _station_cache["ts"] >= _STATION_CACHE_TTL:
+            try:
+                _refresh_station()
+            except Exception as e:
+                print(f"Station refresh error: {e}")
+        _refresh_webcams()
+        time.sleep(_WEBCAM_CACHE_TTL)
 
 
-def _safe_int(v):
-    try:
-        return int(float(v)) if v is not None else None
-    except (ValueError, TypeError):
-        return None
+threading.Thread(target=_refresh_loop, daemon=True, name="cache-refresh").start()
 
 
 if __name__ == "__main__":
@@ -575,4 +764,10 @@ if __name__ == "__main__":
     # Start Hubspace bridge in background thread
     hubspace_controller.start()
 
-    app.run(host="0.0.0.0", port=5000, debug=False)
+    # Single process so alerts and caches stay shared; threads let slow
+    # endpoints (light control, webcam misses) overlap with polling.
+    try:
+        from waitress import serve
+        serve(app, host="0.0.0.0", port=5000, threads=16)
+    except ImportError:
+        app.run(host="0.0.0.0", port=5000, debug=False, threaded=True)
@@ -11,17 +11,34 @@ Cycle:
   5. Repeat
 """
 
+import functools
+import json
+import os
 import time
 import math
+from datetime import datetime
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from sense_hat import SenseHat
 
+# orjson parses the API responses faster on the Pi; stdlib json as fallback
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 # ─── Config ──────────────────────────────────────────────────────────────────
 DIM = 0.15
 ANIM_DURATION = 12        # seconds of animation between scrolls
 REFRESH_MIN = 15          # re-fetch weather interval
 FRAME_DELAY = 0.15        # animation speed
 SCROLL_SPEED = 0.055      # text scroll speed (lower = faster)
+CACHE_FILE = "/var/tmp/weather_sensehat.json"   # survives reboots, unlike /tmp
+GEO_TTL = 7 * 24 * 3600   # a stationary Pi's location is effectively fixed
+FORECAST_TTL = REFRESH_MIN * 60   # restarts inside a refresh window reuse it
 
 WMO = {
     0: ("Clear", "clear"), 1: ("Clear", "clear"),
@@ -36,14 +53,15 @@ WMO = {
     85: ("Snow", "snow"), 86: ("Snow", "snow"),
     95: ("Storm", "storm"), 96: ("Storm", "storm"), 99: ("Storm", "storm"),
 }
+_wmo_get = WMO.get
 
 
 def d(r, g, b):
-    return [max(0, min(255, int(r * DIM))),
-            max(0, min(255, int(g * DIM))),
-            max(0, min(255, int(b * DIM)))]
+    # Callers pass 0-255 literals and DIM < 1, so no clamping is needed
+    return [int(r * DIM), int(g * DIM), int(b * DIM)]
 
 
+@functools.lru_cache(maxsize=256)
 def temp_color(temp_f):
     """Get scroll text color based on temperature."""
     if temp_f < 32:
@@ -57,31 +75,83 @@ def temp_color(temp_f):
     else:
         return d(255, 120, 40)    # hot orange
 
+# One keep-alive session for both APIs; transient failures retry with backoff.
+# Connect/read retries are capped at one each (3s connect, 8s read timeout) so
+# an unreachable host fails in seconds instead of stalling the display loop.
+_SESSION = requests.Session()
+_SESSION.headers["User-Agent"] = "weather_sensehat/1.0"
+_adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=Retry(
+    total=3, connect=1, read=1, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504)))
+_SESSION.mount("http://", _adapter)
+_SESSION.mount("https://", _adapter)
+
+
+def load_cache():
+    """Read the disk cache: {"geo", "forecast", "last_good"}; {} if missing."""
+    try:
+        with open(CACHE_FILE) as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache):
+    # Write-then-rename so a crash mid-write can't leave a truncated cache
+    tmp = CACHE_FILE + ".tmp"
+    try:
+        with open(tmp, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp, CACHE_FILE)
+    except OSError as e:
+        print(f"[fetch] could not write cache: {e}")
+
+
+def get_location(cache):
+    """Return {"lat", "lon"}, from the cache while it is fresh."""
+    geo = cache.get("geo")
+    if geo and time.time() - geo["ts"] < GEO_TTL:
+        return geo["value"]
+    loc = _loads(_SESSION.get("http://ip-api.com/json/?fields=lat,lon", timeout=(3, 8)).content)
+    if "lat" in loc and "lon" in loc:
+        cache["geo"] = {"ts": time.time(), "value": loc}
+    return loc
+
 
 def fetch_weather():
-    """Fetch current + tomorrow weather. Returns dict."""
+    """Fetch current + tomorrow weather. Returns dict.
+
+    Uses the disk cache when it is fresh, and falls back to the last good
+    result (then to placeholders) when the APIs can't be reached.
+    """
+    cache = load_cache()
     try:
-        loc = requests.get("http://ip-api.com/json/?fields=lat,lon", timeout=8).json()
+        loc = get_location(cache)
+        key = f"{loc['lat']}:{loc['lon']}:{time.strftime('%Y-%m-%d')}"
+        fc = cache.get("forecast")
+        if fc and fc["key"] == key and time.time() - fc["ts"] < FORECAST_TTL:
+            print("[fetch] using cached forecast")
+            return fc["value"]
+
         url = (f"https://api.open-meteo.com/v1/forecast?"
                f"latitude={loc['lat']}&longitude={loc['lon']}"
                f"&daily=weathercode,temperature_2m_max,temperature_2m_min,"
                f"precipitation_probability_max"
                f"&current_weather=true"
                f"&temperature_unit=fahrenheit&timezone=auto&forecast_days=3")
-        data = requests.get(url, timeout=8).json()
+        data = _loads(_SESSION.get(url, timeout=(3, 8)).content)
         cw = data["current_weather"]
         daily = data["daily"]
-        from datetime import datetime
 
         cur_code = cw["weathercode"]
-        cur_name, cur_anim = WMO.get(cur_code, ("?", "cloudy"))
+        cur_name, cur_anim = _wmo_get(cur_code, ("?", "cloudy"))
         cur_temp = round(cw["temperature"])
 
         tom_code = daily["weathercode"][1]
-        tom_name, tom_anim = WMO.get(tom_code, ("?", "cloudy"))
+        tom_name, tom_anim = _wmo_get(tom_code, ("?", "cloudy"))
         tom_hi = round(daily["temperature_2m_max"][1])
         tom_lo = round(daily["temperature_2m_min"][1])
-        tom_day = datetime.strptime(daily["time"][1], "%Y-%m-%d").strftime("%a")
+        tom_day = datetime.fromisoformat(daily["time"][1]).strftime("%a")
         tom_precip = daily.get("precipitation_probability_max", [0, 0])[1]
 
         result = {
@@ -90,9 +160,15 @@ def fetch_weather():
             "tom_anim": tom_anim, "tom_day": tom_day, "tom_precip": tom_precip,
         }
         print(f"[fetch] now: {cur_temp}F {cur_name} | {tom_day}: {tom_hi}/{tom_lo}F {tom_name}")
+        cache["forecast"] = {"ts": time.time(), "key": key, "value": result}
+        cache["last_good"] = result
+        save_cache(cache)
         return result
     except Exception as e:
         print(f"[fetch] error: {e}")
+        if cache.get("last_good"):
+            print("[fetch] showing last good forecast")
+            return cache["last_good"]
         return {
             "cur_temp": 45, "cur_name": "?", "cur_anim": "cloudy",
             "tom_hi": 48, "tom_lo": 38, "tom_name": "?",
@@ -102,100 +178,141 @@ def fetch_weather():
 
 # ─── Animations ──────────────────────────────────────────────────────────────
 
+# 8x8 pixel coordinate grids: _XS[y, x] == x, _YS[y, x] == y
+_XS, _YS = np.meshgrid(np.arange(8), np.arange(8))
+
+# Tick-independent geometry, computed once instead of every frame
+_DX, _DY = _XS - 3.5, _YS - 3.5                  # offsets from the sun's center
+_DIST = np.sqrt(_DX*_DX + _DY*_DY)
+_ANG = np.arctan2(_DY, _DX)
+_RAY_FADE = 0.45 * np.maximum(0, 1.0 - _DIST/4.5)
+_WAVE_OVERCAST = _XS*0.5 + _YS*0.3
+_WAVE_FOG = _XS*0.6 + _YS*0.4
+
+
+def _to_pixels(rgb):
+    """Dim an (8, 8, 3) color buffer like d() and flatten to set_pixels' 64 [r, g, b] lists."""
+    return np.clip(rgb * DIM, 0, 255).astype(np.uint8).reshape(64, 3).tolist()
+
+
+def _gray(v, blue):
+    """Color buffer of gray level v with a little extra blue (shape v.shape + (3,))."""
+    rgb = np.empty(v.shape + (3,))
+    rgb[...] = v[..., None]
+    rgb[..., 2] += blue
+    return rgb
+
+
 def frame_clear(tick):
-    pixels = [d(3, 3, 10)] * 64
-    cx, cy = 3.5, 3.5
     phase = tick * 0.08
-    pulse = 0.85 + 0.15 * math.sin(phase)
-    for y in range(8):
-        for x in range(8):
-            dx, dy = x - cx, y - cy
-            dist = math.sqrt(dx*dx + dy*dy)
-            if dist < 2.2 * pulse:
-                b = max(0, 1.0 - dist / (2.2 * pulse))
-                pixels[y*8+x] = d(255*b, 200*b, 50*b)
-            elif dist < 4.0:
-                ang = math.atan2(dy, dx)
-                ray = math.sin(ang * 4 + phase * 1.5)
-                if ray > 0.4:
-                    b = ray * 0.45 * max(0, 1.0 - dist/4.5)
-                    pixels[y*8+x] = d(240*b, 160*b, 30*b)
-    return pixels
+    sun_r = 2.2 * (0.85 + 0.15 * math.sin(phase))  # pulsing core radius
+    core = _DIST < sun_r
+    ray = np.sin(_ANG * 4 + phase * 1.5)
+    rays = ~core & (_DIST < 4.0) & (ray > 0.4)
+    rgb = np.empty((8, 8, 3))
+    rgb[...] = (3, 3, 10)
+    rgb[rays] = (ray[rays] * _RAY_FADE[rays])[:, None] * (240, 160, 30)
+    # Inside the core 1 - dist/r is already positive; only shade masked pixels
+    rgb[core] = (1.0 - _DIST[core] / sun_r)[:, None] * (255, 200, 50)
+    return _to_pixels(rgb)
 
 
 def frame_cloudy(tick):
-    pixels = [d(8, 10, 18)] * 64
     drift = (tick * 0.08) % 16 - 4
     clouds = [(drift, 2, 3.5), (drift + 6, 5, 2.8), (drift - 2, 7, 2.0)]
-    for y in range(8):
-        for x in range(8):
-            br = 0
-            for ccx, ccy, rad in clouds:
-                dd = math.sqrt((x-ccx)**2 + ((y-ccy)*1.6)**2)
-                if dd < rad:
-                    br = max(br, 1.0 - dd/rad)
-            if br > 0.05:
-                v = int(150 * br)
-                pixels[y*8+x] = d(v, v, v+12)
-    return pixels
+    br = np.zeros((8, 8))
+    for ccx, ccy, rad in clouds:
+        if ccx + rad <= 0 or ccx - rad >= 7:
+            continue  # drifted fully off the matrix
+        dd2 = (_XS-ccx)**2 + ((_YS-ccy)*1.6)**2
+        # Compare squared distances; sqrt only matters for the shaded pixels
+        inside = dd2 < rad*rad
+        br[inside] = np.maximum(br[inside], 1.0 - np.sqrt(dd2[inside])/rad)
+    cloud = br > 0.05
+    rgb = np.empty((8, 8, 3))
+    rgb[...] = (8, 10, 18)
+    rgb[cloud] = _gray((150 * br[cloud]).astype(int), 12)
+    return _to_pixels(rgb)
 
 
 def frame_overcast(tick):
-    pixels = []
     phase = tick * 0.04
-    for y in range(8):
-        for x in range(8):
-            v = 65 + int(18 * math.sin(x*0.5 + y*0.3 + phase))
-            pixels.append(d(v, v, v+5))
-    return pixels
+    v = 65 + (18 * np.sin(_WAVE_OVERCAST + phase)).astype(int)
+    return _to_pixels(_gray(v, 5))
 
 
-def frame_rain(tick):
-    pixels = [d(15, 18, 30)] * 64
+# Fixed palettes for the particle animations, dimmed once at load
+_RAIN_BG, _RAIN_FG, _RAIN_TAIL = d(15, 18, 30), d(60, 110, 255), d(30, 55, 130)
+_DRIZZLE_BG, _DRIZZLE_FG = d(20, 22, 35), d(50, 90, 190)
+_SNOW_BG, _SNOW_FG = d(12, 15, 25), d(190, 200, 255)
+_FLASH = d(180, 180, 160)
+
+
+def _render_rain(tick):
+    pixels = [_RAIN_BG] * 64
     for col in range(8):
         drop_y = (tick + col * 3) % 10
         if drop_y < 8:
-            pixels[drop_y*8 + col] = d(60, 110, 255)
+            pixels[drop_y*8 + col] = _RAIN_FG
             if drop_y > 0:
-                pixels[(drop_y-1)*8 + col] = d(30, 55, 130)
+                pixels[(drop_y-1)*8 + col] = _RAIN_TAIL
     return pixels
 
 
-def frame_drizzle(tick):
-    pixels = [d(20, 22, 35)] * 64
-    for col in [1, 3, 5, 7]:
+def _render_drizzle(tick):
+    pixels = [_DRIZZLE_BG] * 64
+    for col in (1, 3, 5, 7):
         drop_y = (tick + col * 4) % 12
         if drop_y < 8:
-            pixels[drop_y*8 + col] = d(50, 90, 190)
+            pixels[drop_y*8 + col] = _DRIZZLE_FG
     return pixels
 
 
-def frame_snow(tick):
-    pixels = [d(12, 15, 25)] * 64
+# Every drop moves one row per tick, so rain repeats every 10 ticks and
+# drizzle every 12: render each distinct frame once and index by tick.
+_RAIN_FRAMES = [_render_rain(t) for t in range(10)]
+_DRIZZLE_FRAMES = [_render_drizzle(t) for t in range(12)]
+_FLASH_FRAME = [_FLASH] * 64
+
+
+def frame_rain(tick):
+    return _RAIN_FRAMES[tick % 10]
+
+
+def frame_drizzle(tick):
+    return _DRIZZLE_FRAMES[tick % 12]
+
+
+def _render_snow(step):
+    pixels = [_SNOW_BG] * 64
     flakes = [(0, 7), (1, 3), (2, 11), (3, 5), (4, 9), (5, 2), (6, 8), (7, 6)]
     for col, offset in flakes:
-        y = (tick // 2 + offset) % 10
+        y = (step + offset) % 10
         if y < 8:
-            x = (col + int(math.sin(tick * 0.1 + offset) * 0.8)) % 8
-            pixels[y*8 + x] = d(190, 200, 255)
+            pixels[y*8 + col] = _SNOW_FG
     return pixels
 
 
+# Flakes fall one row every 2 ticks, so snow repeats every 20 ticks. (The
+# old sideways wobble, int(sin(...) * 0.8), always truncated to 0.)
+_SNOW_FRAMES = [_render_snow(step) for step in range(10)]
+
+
+def frame_snow(tick):
+    return _SNOW_FRAMES[(tick // 2) % 10]
+
+
 def frame_fog(tick):
-    pixels = []
     phase = tick * 0.05
-    for y in range(8):
-        for x in range(8):
-            w = math.sin(x*0.6 + y*0.4 + phase) * 0.5 + 0.5
-            v = int(35 + 45 * w)
-            pixels.append(d(v, v, v+6))
-    return pixels
+    w = np.sin(_WAVE_FOG + phase) * 0.5 + 0.5
+    v = (35 + 45 * w).astype(int)
+    return _to_pixels(_gray(v, 6))
 
 
 def frame_storm(tick):
     if tick % 35 < 2:
-        return [d(180, 180, 160)] * 64
-    return frame_rain(tick)
+        return _FLASH_FRAME
+    return _RAIN_FRAMES[tick % 10]
 
 
 FRAMES = {
@@ -204,16 +321,168 @@ FRAMES = {
     "fog": frame_fog, "storm": frame_storm,
 }
 
+# Ticks advanced per displayed frame. Slow-moving animations skip ticks and
+# wake every stride * FRAME_DELAY instead, at the same apparent speed.
+FRAME_STRIDE = {"cloudy": 2, "overcast": 3, "fog": 2, "snow": 2}
+
+# Frames depend only on (animation, tick) and tick restarts at 0 for every
+# animation, so each rendered frame is kept and replayed on later cycles.
+_FRAME_TICKS = int(ANIM_DURATION / FRAME_DELAY) + 1
+_FRAME_CACHE = {}
+
+
+def _rgb565(pixels):
+    """RGB565 words for a sequence of [r, g, b] pixels, as SenseHat.set_pixels packs them."""
+    a = np.array(pixels, dtype=np.uint16).reshape(-1, 3)
+    return (a[:, 0] >> 3) << 11 | (a[:, 1] >> 2) << 5 | a[:, 2] >> 3
+
+
+def _pack565(pixels):
+    """Pack 64 [r, g, b] pixels into the 128-byte framebuffer image.
+
+    Frames that pack equal look identical on the matrix.
+    """
+    return _rgb565(pixels).tobytes()
+
+
+def render_frame(anim, tick):
+    """Return (pixels, packed) for an animation tick, rendering it only once."""
+    frames = _FRAME_CACHE.setdefault(anim, {})
+    frame = frames.get(tick)
+    if frame is None:
+        pixels = FRAMES.get(anim, frame_cloudy)(tick)
+        frame = (pixels, _pack565(pixels))
+        if tick < _FRAME_TICKS:
+            frames[tick] = frame
+    return frame
+
+
+def warm_frames(*anims):
+    """Render every tick of the given animations up front (between scrolls)."""
+    for anim in anims:
+        for tick in range(0, _FRAME_TICKS, FRAME_STRIDE.get(anim, 1)):
+            render_frame(anim, tick)
+
 
 # ─── Main ────────────────────────────────────────────────────────────────────
 
+def open_framebuffer(sense):
+    """Open the LED framebuffer for whole-frame writes, or None to use set_pixels.
+
+    set_pixels seeks and writes each of the 64 pixels separately; with the
+    default rotation the framebuffer is plain row-major, so one 128-byte
+    write of the packed frame is equivalent.
+    """
+    path = getattr(sense, "_fb_device", None)
+    if not path or getattr(sense, "_rotation", 0) != 0:
+        return None
+    try:
+        return open(path, "wb", buffering=0)
+    except OSError as e:
+        print(f"[main] framebuffer unavailable, using set_pixels: {e}")
+        return None
+
+
+_SCROLL_CACHE = {}
+
+
+def render_scroll(sense, msg, colour):
+    """Pre-render show_message's scroll as packed framebuffer images.
+
+    Mirrors SenseHat.show_message (same glyphs, spacing and rotated pixel
+    map) but builds every window once, cached per (msg, colour), so the
+    scroll is a series of single writes. Returns None if the library's
+    text internals aren't available.
+    """
+    key = (msg, tuple(colour))
+    frames = _SCROLL_CACHE.get(key)
+    if frames is not None:
+        return frames
+    try:
+        lit = [False] * 64
+        for ch in msg:
+            glyph = sense._trim_whitespace(sense._get_char_pixels(ch))
+            lit.extend(p == [255, 255, 255] for p in glyph)
+            lit.extend([False] * 8)
+        lit.extend([False] * 64)
+        pix_map = np.asarray(sense._pix_map[(sense._rotation - 90) % 360]).ravel()
+    except (AttributeError, KeyError, TypeError) as e:
+        print(f"[show] can't pre-render scroll, using show_message: {e}")
+        return None
+
+    words = np.where(np.array(lit), _rgb565([colour])[0], 0).astype(np.uint16)
+    frames = []
+    for i in range(len(lit) // 8 - 8):
+        buf = np.empty(64, dtype=np.uint16)
+        buf[pix_map] = words[i*8:i*8 + 64]
+        frames.append(buf.tobytes())
+    if len(_SCROLL_CACHE) >= 16:  # messages change with the forecast
+        _SCROLL_CACHE.clear()
+    _SCROLL_CACHE[key] = frames
+    return frames
+
+
+def sleep_until(deadline):
+    """Block until a time.monotonic() deadline.
+
+    Returns the deadline to schedule from next: unchanged, or now if it had
+    already passed, so late frames resync instead of bursting to catch up.
+    """
+    now = time.monotonic()
+    if deadline > now:
+        # time.sleep is clock_nanosleep(CLOCK_MONOTONIC) on 3.11+: a true
+        # blocking wait, no spinning
+        time.sleep(deadline - now)
+        return deadline
+    return now
+
+
+def show(sense, fb, msg, temp_f, anim):
+    """Scroll msg in the temperature color, then play anim for ANIM_DURATION."""
+    print(f"[show] {msg}")
+    colour = temp_color(temp_f)
+    frames = render_scroll(sense, msg, colour) if fb else None
+    if frames:
+        deadline = time.monotonic()
+        for packed in frames:
+            fb.seek(0)
+            fb.write(packed)
+            deadline = sleep_until(deadline + SCROLL_SPEED)
+    else:
+        sense.show_message(msg, scroll_speed=SCROLL_SPEED,
+                           text_colour=colour, back_colour=[0, 0, 0])
+    sense.low_light = True
+
+    # Fixed per-frame deadlines so frame cost doesn't stretch FRAME_DELAY
+    stride = FRAME_STRIDE.get(anim, 1)
+    delay = FRAME_DELAY * stride
+    cached = _FRAME_CACHE.setdefault(anim, {})  # resolved once, not per tick
+    deadline = time.monotonic()
+    end = deadline + ANIM_DURATION
+    tick = 0
+    shown = None
+    while deadline < end:
+        pixels, packed = cached.get(tick) or render_frame(anim, tick)
+        if packed != shown:  # skip the LED write when nothing visible changed
+            if fb:
+                fb.seek(0)
+                fb.write(packed)
+            else:
+                sense.set_pixels(pixels)
+            shown = packed
+        tick += stride
+        deadline = sleep_until(deadline + delay)
+
+
 def main():
     sense = SenseHat()
     sense.low_light = True
     sense.clear()
+    fb = open_framebuffer(sense)
 
     wx = fetch_weather()
-    last_fetch = time.time()
+    warm_frames(wx["cur_anim"], wx["tom_anim"])
+    last_fetch = time.monotonic()
     showing_current = True  # start with current weather
 
     print("[main] starting alternating display")
@@ -221,47 +490,19 @@ def main():
     try:
         while True:
             # Re-fetch weather periodically
-            if time.time() - last_fetch > REFRESH_MIN * 60:
+            if time.monotonic() - last_fetch > REFRESH_MIN * 60:
                 wx = fetch_weather()
-                last_fetch = time.time()
+                warm_frames(wx["cur_anim"], wx["tom_anim"])
+                last_fetch = time.monotonic()
 
             if showing_current:
-                # --- CURRENT WEATHER ---
-                msg = f"Now {wx['cur_temp']}F {wx['cur_name']}"
-                tc = temp_color(wx["cur_temp"])
-                print(f"[show] {msg}")
-                sense.show_message(msg, scroll_speed=SCROLL_SPEED,
-                                   text_colour=tc, back_colour=[0, 0, 0])
-                sense.low_light = True
-
-                # Animate current weather for ANIM_DURATION seconds
-                frame_fn = FRAMES.get(wx["cur_anim"], frame_cloudy)
-                start = time.time()
-                tick = 0
-                while time.time() - start < ANIM_DURATION:
-                    sense.set_pixels(frame_fn(tick))
-                    tick += 1
-                    time.sleep(FRAME_DELAY)
-
+                show(sense, fb, f"Now {wx['cur_temp']}F {wx['cur_name']}",
+                     wx["cur_temp"], wx["cur_anim"])
             else:
-                # --- TOMORROW'S FORECAST ---
                 msg = f"{wx['tom_day']} {wx['tom_hi']}/{wx['tom_lo']}F {wx['tom_name']}"
                 if wx["tom_precip"] > 20:
                     msg += f" {wx['tom_precip']}%"
-                tc = temp_color(wx["tom_hi"])
-                print(f"[show] {msg}")
-                sense.show_message(msg, scroll_speed=SCROLL_SPEED,
-                                   text_colour=tc, back_colour=[0, 0, 0])
-                sense.low_light = True
-
-                # Animate tomorrow's weather for ANIM_DURATION seconds
-                frame_fn = FRAMES.get(wx["tom_anim"], frame_cloudy)
-                start = time.time()
-                tick = 0
-                while time.time() - start < ANIM_DURATION:
-                    sense.set_pixels(frame_fn(tick))
-                    tick += 1
-                    time.sleep(FRAME_DELAY)
+                show(sense, fb, msg, wx["tom_hi"], wx["tom_anim"])
 
             # Toggle between current and tomorrow
             showing_current = not showing_current